@@ -1,34 +1,51 @@
 import os
+import time
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.messages import AIMessage
 from typing import Annotated
 from graph_state import GraphState 
+from prompt_context import build_node_prompt, shared_context_inputs
+from call_metrics import record_llm_call_if_live
+from resilience import call_with_resilience, cache_key, DEFAULT_CALL_TIMEOUT_S
 
 # Load environment variables from .env (if present) before initializing the LLM
 load_dotenv()
 
 # --- Model Initialization ---
 # Using a powerful model for complex logic analysis
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1) 
+# Retries and per-call timeouts are handled by resilience.py; the client timeout is only a hard cap
+llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, timeout=DEFAULT_CALL_TIMEOUT_S, max_retries=0) 
 
 # --- Logic Analyzer Prompt ---
-analyzer_prompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", 
-         "You are the **Logic Analyzer** for Hintforge. Your job is to analyze the user's "
-         "failing code against the problem statement. You must identify the root logical "
-         "error and the *correct* algorithmic complexity required. DO NOT give the fix. "
-         "Focus on the flaw's *type* (e.g., greedy choice failed, incorrect DP state, O(N^2) time limit exceeded)."
-         "\n\n---Problem Context---\n{problem_context}\n\n---Failing User Code ({language})---\n{user_code}"),
-        
-        ("human", 
-         "Analyze the user's solution. State the likely reason it fails (e.g., Time Limit Exceeded, Wrong Answer, specific logic bug) "
-         "and the target complexity needed to pass (e.g., O(N log N) or O(N)). "
-         "Provide a concise, internal-only summary. Do not use Markdown formatting.")
-    ]
+analyzer_prompt = build_node_prompt(
+    "You are the **Logic Analyzer** for Hintforge. Your job is to analyze the user's "
+    "failing code against the problem statement. You must identify the root logical "
+    "error and the *correct* algorithmic complexity required. DO NOT give the fix. "
+    "Focus on the flaw's *type* (e.g., greedy choice failed, incorrect DP state, O(N^2) time limit exceeded).",
+    "Analyze the user's solution. State the likely reason it fails (e.g., Time Limit Exceeded, Wrong Answer, specific logic bug) "
+    "and the target complexity needed to pass (e.g., O(N log N) or O(N)). "
+    "Provide a concise, internal-only summary. Do not use Markdown formatting. "
+    "End with a final line of the form 'Suspect code: <line> || <line>' that quotes, verbatim, "
+    "the line(s) of the user's code where the flaw lives."
 )
 
+SUSPECT_CODE_MARKER = "Suspect code:"
+
+
+def split_suspect_code(analysis: str):
+    """
+    Separates the trailing 'Suspect code:' line from the analysis text.
+
+    Returns:
+        tuple: (analysis without the marker line, list of quoted code lines).
+    """
+    head, marker, tail = analysis.rpartition(SUSPECT_CODE_MARKER)
+    if not marker:
+        return analysis.strip(), []
+    lines = [ln.strip() for ln in tail.strip().split("||") if ln.strip()]
+    return head.strip(), lines
+
 # --- Logic Analyzer Node Function ---
 def analyze_logic(state: GraphState) -> GraphState:
     """
@@ -45,25 +62,31 @@ def analyze_logic(state: GraphState) -> GraphState:
     
     if state.get("execution_status") == "ERROR":
         print("Skipping analysis due to previous ingestion error.")
-        return state
+        return {}
 
-    analysis_chain = analyzer_prompt | llm
     
     try:
         # Invoke the LLM to get the internal diagnostic summary
-        response = analysis_chain.invoke(
-            {
-                "problem_context": state["problem_context"],
-                "user_code": state["user_code"],
-                "language": state["language"]
-            }
+        inputs = shared_context_inputs(state)
+        started = time.perf_counter()
+        response, source = call_with_resilience(
+            "openai",
+            lambda timeout: (analyzer_prompt | llm.bind(timeout=timeout)).invoke(inputs),
+            state,
+            "analyze",
+            key=cache_key("analyze", inputs),
+            # Degraded output: the Hacker and Tutor can still work without a diagnosis
+            fallback=lambda: AIMessage(content="Undetermined flaw."),
         )
         
         print(f"Internal Analysis Complete.")
+        analysis, suspect_code = split_suspect_code(response.content)
         
         # Store the internal analysis in 'execution_output' 
         return {
-            "execution_output": response.content,
+            "execution_output": analysis,
+            "diagnosed_region": suspect_code,
+            "llm_metrics": record_llm_call_if_live("analyze", started, response, source),
             # Execution status remains 'FAIL' as we haven't successfully tested the code yet.
         }
         
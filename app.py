@@ -1,28 +1,55 @@
 import os
+import time
 
 import streamlit as st
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
 from hintforge_agent import build_hintforge_graph
+from call_metrics import summarize_llm_metrics
+from incremental import SessionHistory, plan_resubmission
+from resilience import start_deadline, DEFAULT_CALL_TIMEOUT_S
 
 @st.cache_resource
-def get_app():
+def get_app(fused_diagnosis: bool = False):
     """Build and cache the LangGraph app so it is reused across reruns."""
     load_dotenv()
-    return build_hintforge_graph()
+    return build_hintforge_graph(fused_diagnosis=fused_diagnosis)
 
 
-def run_hintforge(problem_url: str, user_code: str, language: str = "C++"):
-    """Helper to invoke the graph with user-provided inputs."""
-    app = get_app()
-    initial_state = {
-        "problem_url": problem_url,
-        "user_code": user_code,
-        "language": language,
-        "reflection_count": 0,
-    }
-    return app.invoke(initial_state)
+def get_history() -> SessionHistory:
+    """Return the attempt history of the current browser session."""
+    if "hintforge_history" not in st.session_state:
+        st.session_state["hintforge_history"] = SessionHistory()
+    return st.session_state["hintforge_history"]
+
+
+def run_hintforge(
+    problem_url: str,
+    user_code: str,
+    language: str = "C++",
+    fused_diagnosis: bool = False,
+    history: SessionHistory = None,
+    generator_mode: bool = False,
+):
+    """
+    Helper to invoke the graph with user-provided inputs.
+    If a session history is given, resubmissions only re-run what the edit invalidates.
+    Returns the final state and a summary of the run's latency and token usage.
+    """
+    app = get_app(fused_diagnosis)
+    started = time.perf_counter()
+    deadline_at = start_deadline()
+    previous_state = history.last_state if history is not None else None
+    initial_state = plan_resubmission(previous_state, problem_url, user_code, language)
+    initial_state["deadline_at"] = deadline_at
+    initial_state["generator_mode"] = generator_mode
+    final_state = app.invoke(initial_state)
+    metrics = summarize_llm_metrics(final_state.get("llm_metrics"), time.perf_counter() - started)
+    metrics["resubmission_mode"] = initial_state["resubmission_mode"]
+    if history is not None:
+        history.record(final_state, metrics)
+    return final_state, metrics
 
 
 def suggest_learning_resources(analysis: str, language: str) -> list[str]:
@@ -33,7 +60,7 @@ def suggest_learning_resources(analysis: str, language: str) -> list[str]:
     if not os.getenv("OPENAI_API_KEY"):
         return []
 
-    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2)
+    llm = ChatOpenAI(model="gpt-4o-mini", temperature=0.2, timeout=DEFAULT_CALL_TIMEOUT_S)
     prompt = (
         "You are a tutoring assistant helping a competitive programming student.\n"
         "Based on the following analysis of their mistake, suggest 3–5 high‑quality "
@@ -71,6 +98,18 @@ def main():
             value="",
         )
         language = st.selectbox("Language", ["C++", "Python", "Java"], index=0)
+        fused_diagnosis = st.checkbox(
+            "Fused analysis + counter-example call",
+            value=os.getenv("HINTFORGE_FUSED_DIAGNOSIS", "0").lower() in ("1", "true", "yes"),
+            help="Diagnose the flaw and generate the counter-example in one structured LLM call.",
+        )
+        generator_mode = st.checkbox(
+            "Large counter-examples (generator script)",
+            value=os.getenv("HINTFORGE_GENERATOR_MODE", "0").lower() in ("1", "true", "yes"),
+            help="Let the Hacker write a script that generates a max-size input locally, e.g. to expose a TLE.",
+        )
+        if st.button("Start over", help="Forget previous attempts and analyze the next run from scratch."):
+            get_history().clear()
 
         st.markdown("**Environment**")
         has_openai = bool(os.getenv("OPENAI_API_KEY"))
@@ -109,7 +148,9 @@ def main():
 
         with st.spinner("Running agent... this may take a few seconds."):
             try:
-                final_state = run_hintforge(problem_url.strip(), user_code, language)
+                final_state, metrics = run_hintforge(
+                    problem_url.strip(), user_code, language, fused_diagnosis, get_history(), generator_mode
+                )
             except Exception as e:
                 st.error(f"FATAL ERROR DURING EXECUTION: {e}")
                 return
@@ -126,7 +167,18 @@ def main():
                 )
 
                 st.markdown("### Counter-example input")
-                st.code(final_hint.counter_example_input, language="")
+                if final_state.get("test_case_path"):
+                    # Generated inputs stay on disk; only their preview is shown
+                    st.caption(
+                        f"Generated input: {final_state.get('test_case_size', 0):,} bytes "
+                        f"(preview below, full file at {final_state['test_case_path']})"
+                    )
+                    st.code(final_state.get("test_case_preview", ""), language="")
+                    if final_state.get("generator_code"):
+                        with st.expander("Generator script"):
+                            st.code(final_state["generator_code"], language="python")
+                else:
+                    st.code(final_hint.counter_example_input, language="")
 
                 st.markdown("### Analysis")
                 st.write(final_hint.analysis)
@@ -149,6 +201,13 @@ def main():
             else:
                 st.warning("Process ended without producing a hint.")
 
+            st.caption(
+                f"{metrics['llm_calls']} LLM calls · {metrics['input_tokens']} input tokens "
+                f"({metrics['cached_tokens']} cached, {metrics['cache_hit_ratio']:.0%}) · "
+                f"end-to-end {metrics['end_to_end_latency_s']}s · "
+                f"attempt {len(get_history().attempts)} ({metrics['resubmission_mode']})"
+            )
+
 
 if __name__ == "__main__":
     main()
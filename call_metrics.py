@@ -0,0 +1,67 @@
+import time
+from typing import List, Optional
+
+# --- LLM Call Metrics ---
+# Each node appends one record per LLM call to the 'llm_metrics' list in the GraphState.
+# The records carry latency and token usage (including cached prompt tokens), so the
+# effect of prefix caching and of the fused diagnosis mode can be compared run-to-run.
+
+def record_llm_call(node: str, started: float, message=None) -> dict:
+    """
+    Builds a metrics record for a single LLM call.
+
+    Args:
+        node (str): The name of the graph node that made the call.
+        started (float): The time.perf_counter() value taken just before the call.
+        message: The raw AIMessage returned by the model (None if unavailable).
+
+    Returns:
+        dict: The latency and token usage of the call.
+    """
+    usage = getattr(message, "usage_metadata", None) or {}
+    input_details = usage.get("input_token_details") or {}
+    return {
+        "node": node,
+        "latency_s": round(time.perf_counter() - started, 3),
+        "input_tokens": usage.get("input_tokens", 0),
+        "cached_tokens": input_details.get("cache_read", 0) or 0,
+        "output_tokens": usage.get("output_tokens", 0),
+    }
+
+
+def record_llm_call_if_live(node: str, started: float, message, source: str) -> List[dict]:
+    """
+    Builds the 'llm_metrics' update for a call made through call_with_resilience().
+    Cached and degraded results are not real calls, so they produce no record.
+
+    Returns:
+        list[dict]: One record if the result came from the provider, otherwise an empty list.
+    """
+    return [record_llm_call(node, started, message)] if source == "provider" else []
+
+
+def summarize_llm_metrics(metrics: Optional[List[dict]], total_latency_s: Optional[float] = None) -> dict:
+    """
+    Aggregates the per-call records of one graph run.
+
+    Args:
+        metrics (list[dict]): The 'llm_metrics' list from the final GraphState.
+        total_latency_s (float): The measured end-to-end latency of the run, if known.
+
+    Returns:
+        dict: Totals for calls, tokens, cached tokens, cache hit ratio and latency.
+    """
+    metrics = metrics or []
+    input_tokens = sum(m.get("input_tokens", 0) for m in metrics)
+    cached_tokens = sum(m.get("cached_tokens", 0) for m in metrics)
+    summary = {
+        "llm_calls": len(metrics),
+        "input_tokens": input_tokens,
+        "cached_tokens": cached_tokens,
+        "output_tokens": sum(m.get("output_tokens", 0) for m in metrics),
+        "cache_hit_ratio": round(cached_tokens / input_tokens, 3) if input_tokens else 0.0,
+        "llm_latency_s": round(sum(m.get("latency_s", 0.0) for m in metrics), 3),
+    }
+    if total_latency_s is not None:
+        summary["end_to_end_latency_s"] = round(total_latency_s, 3)
+    return summary
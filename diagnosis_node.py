@@ -0,0 +1,80 @@
+import time
+from langchain_openai import ChatOpenAI
+from graph_state import GraphState, Diagnosis  # Import the Diagnosis schema
+from prompt_context import build_node_prompt, shared_context_inputs
+from call_metrics import record_llm_call_if_live
+from resilience import call_with_resilience, cache_key, DEFAULT_CALL_TIMEOUT_S
+
+# --- Model Initialization ---
+# One structured call replaces the separate Analyzer and Hacker round-trips
+base_llm_diagnosis = ChatOpenAI(model="gpt-4o-mini", temperature=0.1, timeout=DEFAULT_CALL_TIMEOUT_S, max_retries=0)
+
+# --- Fused Analyzer + Hacker Prompt ---
+diagnosis_prompt = build_node_prompt(
+    "You are the **Logic Analyzer and Hacker** for Hintforge. First, analyze the user's "
+    "failing code against the problem statement: identify the root logical error and the "
+    "*correct* algorithmic complexity required. DO NOT give the fix. Focus on the flaw's *type* "
+    "(e.g., greedy choice failed, incorrect DP state, O(N^2) time limit exceeded). "
+    "Then generate a single, minimal, highly effective test case that exploits exactly that flaw. "
+    "The test case must be valid according to the problem constraints.",
+    "Fill in the Diagnosis fields. 'analysis' is a concise, internal-only summary without Markdown "
+    "stating the likely failure reason and the target complexity. 'counter_example_input' is ONLY the "
+    "raw input data, formatted exactly as expected by the problem statement, with no explanation. "
+    "'suspect_code' quotes, verbatim, the line(s) of the user's code where the flaw lives."
+)
+
+# --- Fused Diagnosis Node Function ---
+def diagnose_and_hack(state: GraphState) -> GraphState:
+    """
+    Diagnoses the flaw and generates the counter-example in a single structured LLM call.
+    Used instead of the Analyzer and Hacker nodes when the graph is built in fused mode.
+
+    Args:
+        state (GraphState): The current state of the graph.
+
+    Returns:
+        GraphState: The updated state with execution_output and generated_test_case.
+    """
+    print("---DIAGNOSIS NODE: Diagnosing Flaw and Generating Counter-Example---")
+
+    if state.get("execution_status") == "ERROR":
+        print("Skipping diagnosis due to previous ingestion error.")
+        return {}
+
+
+    try:
+        inputs = shared_context_inputs(state)
+        started = time.perf_counter()
+        result, source = call_with_resilience(
+            "openai",
+            lambda timeout: (
+                diagnosis_prompt
+                | base_llm_diagnosis.with_structured_output(Diagnosis, include_raw=True, timeout=timeout)
+            ).invoke(inputs),
+            state,
+            "diagnose",
+            key=cache_key("diagnose", inputs),
+        )
+        if result["parsed"] is None:
+            raise ValueError(f"Could not parse the structured diagnosis: {result['parsing_error']}")
+        diagnosis: Diagnosis = result["parsed"]
+
+        test_case = diagnosis.counter_example_input.strip()
+        print(f"Diagnosis Complete. Generated Test Case: \n{test_case[:50]}...")
+
+        return {
+            "execution_output": diagnosis.analysis,
+            "diagnosed_region": diagnosis.suspect_code,
+            "generated_test_case": test_case,
+            "execution_status": "FAIL",
+            "llm_metrics": record_llm_call_if_live("diagnose", started, result["raw"], source),
+        }
+
+    except Exception as e:
+        print(f"ERROR in Diagnosis Node: {e}")
+        return {
+            "execution_status": "ERROR",
+            "final_response": f"❌ Error during fused diagnosis: {e}"
+        }
+
+# ---
@@ -1,4 +1,5 @@
-from typing import TypedDict, List, Optional, Literal
+import operator
+from typing import TypedDict, List, Optional, Literal, Annotated
 from pydantic import BaseModel, Field
 
 class Hint(BaseModel):
@@ -8,6 +9,12 @@ class Hint(BaseModel):
     socratic_hint: str = Field(description="The actual Socratic hint given to the user. Must be non-spoiler and guide their thinking.")
     complexity_advice: Optional[str] = Field(description="Advice regarding the algorithmic complexity, if applicable (e.g., 'Consider an O(N log N) approach').")
 
+class Diagnosis(BaseModel):
+    """Structured output for the fused Analyzer + Hacker call."""
+    analysis: str = Field(description="Internal-only summary of why the code fails (e.g., 'Wrong Answer: greedy choice fails when...') and the target complexity needed to pass.")
+    counter_example_input: str = Field(description="The raw input data of a minimal test case that exploits the flaw, formatted exactly as the problem statement expects.")
+    suspect_code: List[str] = Field(default_factory=list, description="The line(s) of the user's code where the flaw lives, quoted verbatim.")
+
 # --- Graph State Definition ---
 class GraphState(TypedDict):
     """
@@ -22,11 +29,22 @@ class GraphState(TypedDict):
     problem_context: str
     
     # Hacker/Test Generator Output
-    generated_test_case: str
+    generated_test_case: str # The raw input, or only its preview in generator mode
+    
+    # Generator Mode: the input is produced by a local script and kept on disk
+    generator_mode: bool
+    generator_code: Optional[str]
+    test_case_path: Optional[str] # Handle of the generated input file
+    test_case_size: int # Size of the generated input in bytes
+    test_case_preview: str
     
     # Code Execution/Analysis Output
     execution_status: Literal["PASS", "FAIL", "ERROR"]
     execution_output: str # stdout/stderr or simplified error message
+    diagnosed_region: List[str] # Verbatim user-code lines the diagnosis points at
+    
+    # Resubmission Handling (see incremental.py)
+    resubmission_mode: Literal["full", "reanalyze", "reuse_analysis", "followup"]
     
     # Tutor/Critic Output
     current_hint: Optional[Hint]
@@ -34,4 +52,11 @@ class GraphState(TypedDict):
     feedback: Optional[str] # Used by the Critic node to give feedback to the Tutor
     
     # Final Output
-    final_response: Optional[str]
\ No newline at end of file
+    final_response: Optional[str]
+    
+    # Absolute time.monotonic() deadline of the request (see resilience.py)
+    deadline_at: Optional[float]
+    
+    # Per-call LLM latency and token usage (appended to by every node).
+    # The list is accumulated, so nodes must return only their updates, never the whole state.
+    llm_metrics: Annotated[List[dict], operator.add]
\ No newline at end of file
@@ -1,31 +1,90 @@
 import os
+import re
+import time
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 from typing import Annotated
 from graph_state import GraphState 
+from prompt_context import build_node_prompt, shared_context_inputs
+from call_metrics import record_llm_call_if_live
+from resilience import call_with_resilience, cache_key, node_budget, DEFAULT_CALL_TIMEOUT_S
+from sandbox_runner import run_code, new_case_path, file_preview
 
 # --- Model Initialization ---
 # Using a powerful model to reliably generate complex test cases
-llm_hacker = ChatOpenAI(model="gpt-4o-mini", temperature=0.3) 
+llm_hacker = ChatOpenAI(model="gpt-4o-mini", temperature=0.3, timeout=DEFAULT_CALL_TIMEOUT_S, max_retries=0) 
 
 # --- Hacker Node Prompt ---
-hacker_prompt = ChatPromptTemplate.from_messages(
-    [
-        ("system", 
-         "You are the **Hacker Node** for Hintforge. Your job is to generate a single, minimal, "
-         "highly effective test case that exploits the logical flaw described in the 'Internal Analysis'. "
-         "The test case must be valid according to the problem constraints."
-         "\n\n---Problem Context---\n{problem_context}"
-         "\n\n---Failing User Code ({language})---\n{user_code}"
-         "\n\n---Internal Analysis of Flaw (Type: {execution_output})---\n"
-         "Your generated test case will be run against this user code to confirm the failure."),
-        
-        ("human", 
-         "Based on the analysis, generate ONLY the raw input data (the test case) that would cause the user's code to fail. "
-         "Do not include any explanation, headers, or surrounding text, just the required input data formatted exactly as expected by the problem statement.")
-    ]
+hacker_prompt = build_node_prompt(
+    "You are the **Hacker Node** for Hintforge. Your job is to generate a single, minimal, "
+    "highly effective test case that exploits the logical flaw described in the 'Internal Analysis'. "
+    "The test case must be valid according to the problem constraints."
+    "\n\n---Internal Analysis of Flaw (Type: {execution_output})---\n"
+    "Your generated test case will be run against this user code to confirm the failure.",
+    "Based on the analysis, generate ONLY the raw input data (the test case) that would cause the user's code to fail. "
+    "Do not include any explanation, headers, or surrounding text, just the required input data formatted exactly as expected by the problem statement."
+)
+
+# --- Generator Mode ---
+# Inputs that trigger TLE (e.g., 2*10^5 numbers) are far too large for the LLM to print.
+# In generator mode the Hacker writes a small Python program instead; it is run locally,
+# its output is streamed to a file, and only a handle, the size and a preview enter the state.
+GENERATOR_TIMEOUT_S = 20.0
+GENERATOR_MAX_BYTES = 256 * 1024 * 1024
+PREVIEW_CHARS = 500
+
+generator_prompt = build_node_prompt(
+    "You are the **Hacker Node** for Hintforge. Your job is to generate a single, "
+    "highly effective test case that exploits the logical flaw described in the 'Internal Analysis'. "
+    "The test case must be valid according to the problem constraints; when the flaw is a time limit, "
+    "it should use the maximum allowed input size."
+    "\n\n---Internal Analysis of Flaw (Type: {execution_output})---\n"
+    "Your generated test case will be run against this user code to confirm the failure.",
+    "Write ONLY a short, self-contained Python 3 program (standard library only) that prints the test case "
+    "to stdout, formatted exactly as expected by the problem statement. It must read no input, be deterministic "
+    "(seed any randomness), and build its output efficiently (e.g., one sys.stdout.write of a joined string). "
+    "Do not include any explanation or Markdown fences."
 )
 
+_CODE_FENCE = re.compile(r"^```[\w+-]*\n(.*?)\n?```$", re.DOTALL)
+
+
+def run_generator(generator_code: str, timeout_s: float = GENERATOR_TIMEOUT_S) -> dict:
+    """
+    Runs a generator program and streams its output to a file.
+
+    Args:
+        generator_code (str): The Python generator program.
+        timeout_s (float): Wall-clock limit for the generator run.
+
+    Returns:
+        dict: The state fields describing the generated input (handle, size and preview).
+    """
+    path = new_case_path()
+    result = run_code(
+        generator_code,
+        "Python",
+        timeout_s=timeout_s,
+        stdout_path=path,
+        max_output_bytes=GENERATOR_MAX_BYTES,
+    )
+    if result["status"] != "OK":
+        os.remove(path)
+        raise RuntimeError(f"Generator script failed ({result['status']}): {result['stderr'][-500:]}")
+
+    size = os.path.getsize(path)
+    if size == 0:
+        os.remove(path)
+        raise RuntimeError("Generator script produced no output.")
+
+    preview = file_preview(path, PREVIEW_CHARS)
+    return {
+        "test_case_path": path,
+        "test_case_size": size,
+        "test_case_preview": preview,
+        # Downstream prompts only ever see the preview, never the full input
+        "generated_test_case": preview,
+    }
+
 # --- Hacker Node Function ---
 def generate_test_case(state: GraphState) -> GraphState:
     """
@@ -35,37 +94,56 @@ def generate_test_case(state: GraphState) -> GraphState:
         state (GraphState): The current state of the graph.
         
     Returns:
-        GraphState: The updated state with the generated_test_case.
+        GraphState: The updated state with the generated_test_case (and, in generator
+            mode, the handle, size and preview of the generated input file).
     """
     print("---HACKER NODE: Generating Counter-Example---")
     
     if state.get("execution_status") == "ERROR":
         print("Skipping test case generation due to previous error.")
-        return state
+        return {}
 
-    hacker_chain = hacker_prompt | llm_hacker
+    generator_mode = bool(state.get("generator_mode"))
+    # The LLM call and the generator run share the Hacker's slice of the request deadline
+    budget_ends = time.monotonic() + node_budget(state, "hacker")
+    prompt = generator_prompt if generator_mode else hacker_prompt
     
     try:
         # Invoke the LLM to generate the raw test case input
-        response = hacker_chain.invoke(
-            {
-                "problem_context": state["problem_context"],
-                "user_code": state["user_code"],
-                "language": state["language"],
-                "execution_output": state.get("execution_output", "Undetermined flaw.")
-            }
+        inputs = {
+            **shared_context_inputs(state),
+            "execution_output": state.get("execution_output", "Undetermined flaw.")
+        }
+        started = time.perf_counter()
+        response, source = call_with_resilience(
+            "openai", lambda timeout: (prompt | llm_hacker.bind(timeout=timeout)).invoke(inputs), state, "hacker",
+            key=cache_key("hacker", generator_mode, inputs),
         )
         
-        test_case = response.content.strip()
-        print(f"Generated Test Case: \n{test_case[:50]}...") # Show a snippet
+        if generator_mode:
+            generator_code = response.content.strip()
+            fenced = _CODE_FENCE.match(generator_code)
+            if fenced:
+                generator_code = fenced.group(1)
+            timeout_s = min(GENERATOR_TIMEOUT_S, budget_ends - time.monotonic())
+            if timeout_s <= 0:
+                raise TimeoutError("No time left in the request deadline to run the generator.")
+            test_case_fields = run_generator(generator_code, timeout_s)
+            test_case_fields["generator_code"] = generator_code
+            print(f"Generated Test Case: {test_case_fields['test_case_size']:,} bytes at {test_case_fields['test_case_path']}")
+        else:
+            test_case = response.content.strip()
+            test_case_fields = {"generated_test_case": test_case, "test_case_path": None}
+            print(f"Generated Test Case: \n{test_case[:50]}...") # Show a snippet
         
         # NOTE: In a real system, we would execute the user_code here with 'test_case'
         # and confirm it fails. For this prototype, we assume it's valid.
         
         return {
-            "generated_test_case": test_case,
+            **test_case_fields,
             # We skip actual execution and move straight to tutoring for the prototype
             "execution_status": "FAIL", 
+            "llm_metrics": record_llm_call_if_live("hacker", started, response, source),
         }
         
     except Exception as e:
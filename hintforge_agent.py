@@ -1,37 +1,62 @@
 
 import os
+import time
 from dotenv import load_dotenv
 load_dotenv()
 from langgraph.graph import StateGraph, END
-from typing import Literal
+from typing import Literal, Optional
 from graph_state import GraphState # Contains GraphState and Hint schemas
 from ingestor_node import ingest_problem_context
 from analyzer_node import analyze_logic
 from hacker_node import generate_test_case
+from diagnosis_node import diagnose_and_hack
 from tutor_node import generate_socratic_hint
 from critic_node import critique_hint
-from router_function import route_to_reflection
+from router_function import route_to_reflection, route_entry, route_after_diagnosis, ENTRY_NODES
+from call_metrics import summarize_llm_metrics
+from resilience import start_deadline
 
 # Load environment variables from a local .env file (if present)
 
 
-def build_hintforge_graph():
-    """Builds and compiles the Hintforge LangGraph."""
+def build_hintforge_graph(fused_diagnosis: Optional[bool] = None):
+    """
+    Builds and compiles the Hintforge LangGraph.
+
+    Args:
+        fused_diagnosis (bool): If True, a single structured call returns both the diagnosis
+            and the counter-example instead of separate Analyzer and Hacker calls.
+            Defaults to the HINTFORGE_FUSED_DIAGNOSIS environment variable.
+    """
+    if fused_diagnosis is None:
+        fused_diagnosis = os.getenv("HINTFORGE_FUSED_DIAGNOSIS", "0").lower() in ("1", "true", "yes")
     
     # 1. Define the Graph and the State
     workflow = StateGraph(GraphState)
 
     # 2. Define the Nodes (Computational Steps)
     workflow.add_node("ingest", ingest_problem_context)
-    workflow.add_node("analyze", analyze_logic)
+    workflow.add_node("analyze", diagnose_and_hack if fused_diagnosis else analyze_logic)
+    # The Hacker also serves resubmissions that reuse the previous analysis
     workflow.add_node("hacker", generate_test_case)
     workflow.add_node("tutor", generate_socratic_hint)
     workflow.add_node("critic", critique_hint)
 
     # 3. Define the Edges (Sequential Flow)
-    workflow.set_entry_point("ingest")
+    # Resubmissions may start further down the pipeline (see incremental.py)
+    workflow.set_conditional_entry_point(
+        route_entry,
+        {node: node for node in ENTRY_NODES.values()}
+    )
     workflow.add_edge("ingest", "analyze")
-    workflow.add_edge("analyze", "hacker")
+    if fused_diagnosis:
+        workflow.add_conditional_edges(
+            "analyze",
+            route_after_diagnosis,
+            {"hacker": "hacker", "tutor": "tutor"}
+        )
+    else:
+        workflow.add_edge("analyze", "hacker")
     workflow.add_edge("hacker", "tutor")
     workflow.add_edge("tutor", "critic")
 
@@ -105,12 +130,16 @@ if __name__ == "__main__":
     # 3. Invoke the Graph
     try:
         # Stream the result for better visibility of the workflow
+        initial_state["deadline_at"] = start_deadline()
         for s in hintforge_app.stream(initial_state):
             print(s)
             print("-" * 20)
 
         # After streaming deltas, run once more to get the final full GraphState
+        started = time.perf_counter()
+        initial_state["deadline_at"] = start_deadline()
         final_state = hintforge_app.invoke(initial_state)
+        metrics = summarize_llm_metrics(final_state.get("llm_metrics"), time.perf_counter() - started)
 
         print("\n--- ✅ FINAL RESULT ---")
         # The final_state['current_hint'] is the validated, non-spoiler response (if present)
@@ -122,7 +151,11 @@ if __name__ == "__main__":
             # Treat presence of a Hint as success, even if execution_status is still "FAIL"
             print(f"\n✨ Hintforge Reflection Complete in {final_state.get('reflection_count', 1)} passes.")
             print("\n**YOUR COUNTER-EXAMPLE**")
-            print(f"Input: \n{final_hint.counter_example_input}")
+            if final_state.get("test_case_path"):
+                print(f"Generated input ({final_state.get('test_case_size', 0):,} bytes) at {final_state['test_case_path']}")
+                print(f"Preview: \n{final_state.get('test_case_preview', '')}")
+            else:
+                print(f"Input: \n{final_hint.counter_example_input}")
             print("\n**HINT FORGE TUTOR**")
             print(f"Analysis: {final_hint.analysis}")
             print(f"Hint: {final_hint.socratic_hint}")
@@ -134,6 +167,13 @@ if __name__ == "__main__":
         else:
             # No hint and no explicit ERROR status
             print("Process ended without producing a hint.")
+
+        print("\n**RUN METRICS**")
+        print(
+            f"{metrics['llm_calls']} LLM calls, {metrics['input_tokens']} input tokens "
+            f"({metrics['cached_tokens']} cached, {metrics['cache_hit_ratio']:.0%}), "
+            f"end-to-end latency {metrics['end_to_end_latency_s']}s"
+        )
             
     except Exception as e:
         print(f"\nFATAL ERROR DURING EXECUTION: {e}")
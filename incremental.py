@@ -0,0 +1,186 @@
+import difflib
+import os
+from typing import List, Optional
+from graph_state import GraphState
+from sandbox_runner import run_code, discard_case
+
+# --- Incremental Re-analysis for Resubmissions ---
+# Students usually change a couple of lines and press "Run" again. Instead of starting
+# the graph from scratch, the previous final state is used to decide how much work the
+# edit actually invalidates:
+#   followup        - the previous counter-example still breaks the new code -> Tutor only
+#   reuse_analysis  - the edit does not touch the diagnosed region -> Hacker, then Tutor
+#   reanalyze       - same problem, but the diagnosis is stale -> Analyzer onwards
+#   full            - first attempt (or a different problem/language) -> whole graph
+
+FOLLOWUP_FEEDBACK = (
+    "FOLLOW-UP: The student resubmitted an edited solution, but the previous counter-example "
+    "still breaks it ({reason}). Their previous hint was: \"{previous_hint}\". Give a follow-up "
+    "hint that goes one step further than the previous one without repeating it or spoiling the fix."
+)
+
+
+def changed_old_lines(old_code: str, new_code: str) -> set:
+    """
+    Returns the 0-based indices of old-code lines that the edit replaced or deleted.
+    A pure insertion is attributed to the old lines on both sides of it.
+    """
+    old_lines = old_code.splitlines()
+    new_lines = new_code.splitlines()
+    matcher = difflib.SequenceMatcher(a=old_lines, b=new_lines, autojunk=False)
+    changed = set()
+    for tag, i1, i2, _, _ in matcher.get_opcodes():
+        if tag in ("replace", "delete"):
+            changed.update(range(i1, i2))
+        elif tag == "insert":
+            changed.update(i for i in (i1 - 1, i1) if 0 <= i < len(old_lines))
+    return changed
+
+
+def region_lines(code: str, region: List[str]) -> Optional[set]:
+    """
+    Locates the quoted diagnosed lines in the code.
+
+    Returns:
+        set: The 0-based indices of the matching lines, or None if any quoted line is not found.
+    """
+    stripped = [ln.strip() for ln in code.splitlines()]
+    indices = set()
+    for quoted in region:
+        matches = [i for i, ln in enumerate(stripped) if ln and ln == quoted.strip()]
+        if not matches:
+            return None
+        indices.update(matches)
+    return indices
+
+
+def _run_on_counter_example(previous_state: dict, code: str, language: str) -> Optional[str]:
+    """Runs code on the previous counter-example; returns the run status, or None without an input."""
+    test_case_path = previous_state.get("test_case_path")
+    if test_case_path and os.path.exists(test_case_path):
+        # Generated inputs are streamed from disk; the output is not needed
+        return run_code(code, language, stdin_path=test_case_path, stdout_path=os.devnull)["status"]
+    if previous_state.get("generated_test_case") and not test_case_path:
+        return run_code(code, language, previous_state["generated_test_case"])["status"]
+    return None
+
+
+def counter_example_still_breaks(previous_state: dict, new_code: str, language: str) -> Optional[str]:
+    """
+    Runs the new code on the previous counter-example.
+
+    The counter-example comes without an expected output and was never verified, so
+    matching outputs prove nothing (a correct fix of a TLE prints the same answers as
+    the slow version on a small input), and a crash alone may just mean the input is
+    malformed. The input only counts as still breaking the code if the new code times
+    out or crashes on it AND the old code failed on it the same way.
+
+    Returns:
+        str: A short reason if the new code is still broken by it, otherwise None.
+    """
+    new_status = _run_on_counter_example(previous_state, new_code, language)
+    if new_status not in ("TIMEOUT", "RUNTIME_ERROR"):
+        # OK, compile errors, a missing toolchain or no input: no evidence, so fall back to analysis.
+        return None
+    # Only run the old code when it matters, so a correct fix costs one run
+    if _run_on_counter_example(previous_state, previous_state["user_code"], language) != new_status:
+        return None
+    return "it still ends with " + new_status.replace("_", " ").lower()
+
+
+def plan_resubmission(previous_state: Optional[dict], problem_url: str, user_code: str, language: str) -> GraphState:
+    """
+    Builds the initial state for a run, seeding it from the previous attempt when possible.
+
+    Args:
+        previous_state (dict): The final state of the previous attempt in this session (or None).
+        problem_url (str): The problem URL of the new attempt.
+        user_code (str): The (possibly edited) solution of the new attempt.
+        language (str): The language of the new attempt.
+
+    Returns:
+        GraphState: The initial state, with 'resubmission_mode' telling the graph where to start.
+    """
+    initial_state = {
+        "problem_url": problem_url,
+        "user_code": user_code,
+        "language": language,
+        "reflection_count": 0,
+        "resubmission_mode": "full",
+    }
+
+    if (
+        not previous_state
+        or previous_state.get("execution_status") == "ERROR"
+        or previous_state.get("problem_url") != problem_url
+        or previous_state.get("language") != language
+        or not previous_state.get("problem_context")
+    ):
+        return initial_state
+
+    initial_state.update({
+        "problem_context": previous_state["problem_context"],
+        "execution_status": "FAIL",
+        "resubmission_mode": "reanalyze",
+    })
+
+    previous_hint = previous_state.get("current_hint")
+    # A follow-up is never chained on the same input: if the first one did not help,
+    # the diagnosis (or the counter-example itself) is what needs another look.
+    already_followed_up = previous_state.get("resubmission_mode") == "followup"
+    reason = None
+    if previous_hint is not None and not already_followed_up:
+        reason = counter_example_still_breaks(previous_state, user_code, language)
+    if reason:
+        initial_state.update({
+            "resubmission_mode": "followup",
+            "execution_output": previous_state.get("execution_output", ""),
+            "diagnosed_region": previous_state.get("diagnosed_region", []),
+            "generated_test_case": previous_state["generated_test_case"],
+            "test_case_path": previous_state.get("test_case_path"),
+            "test_case_size": previous_state.get("test_case_size", 0),
+            "test_case_preview": previous_state.get("test_case_preview", ""),
+            "generator_code": previous_state.get("generator_code"),
+            "feedback": FOLLOWUP_FEEDBACK.format(reason=reason, previous_hint=previous_hint.socratic_hint),
+        })
+        return initial_state
+
+    region = previous_state.get("diagnosed_region") or []
+    diagnosed = region_lines(previous_state["user_code"], region) if region else None
+    if diagnosed and not diagnosed & changed_old_lines(previous_state["user_code"], user_code):
+        initial_state.update({
+            "resubmission_mode": "reuse_analysis",
+            "execution_output": previous_state.get("execution_output", ""),
+            "diagnosed_region": region,
+        })
+
+    return initial_state
+
+
+class SessionHistory:
+    """Keeps the attempts of one UI session so later runs can build on earlier ones."""
+
+    def __init__(self):
+        self.attempts: List[dict] = []
+
+    def record(self, final_state: dict, metrics: Optional[dict] = None):
+        """
+        Stores the final state (and run metrics) of an attempt. Only the latest attempt
+        is ever resumed from, so the generated input of the one it supersedes is deleted
+        unless the new attempt still uses it (a follow-up on the same counter-example).
+        """
+        previous = self.last_state
+        if previous and previous.get("test_case_path") != final_state.get("test_case_path"):
+            discard_case(previous.get("test_case_path"))
+        self.attempts.append({"state": final_state, "metrics": metrics or {}})
+
+    @property
+    def last_state(self) -> Optional[dict]:
+        """The final state of the most recent attempt, if any."""
+        return self.attempts[-1]["state"] if self.attempts else None
+
+    def clear(self):
+        """Forgets all attempts and deletes their generated input files."""
+        for attempt in self.attempts:
+            discard_case(attempt["state"].get("test_case_path"))
+        self.attempts.clear()
@@ -3,12 +3,49 @@ from tavily import TavilyClient
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from typing import Annotated
 from graph_state import GraphState  # Assuming you put the GraphState definition in graph_state.py
+from resilience import call_with_resilience, cache_key
+from problem_sources import find_adapter, fetch_problem_statement
+
+# --- Tavily Fallback ---
+def search_with_tavily(problem_url: str, state: GraphState) -> str:
+    """
+    Retrieves the problem text through a Tavily web search for the URL.
+    Used for sites without a direct adapter (see problem_sources.py).
+    """
+    tavily_api_key = os.getenv("TAVILY_API_KEY")
+    if not tavily_api_key:
+        raise ValueError("TAVILY_API_KEY is not set in the environment/.env file.")
+
+    client = TavilyClient(api_key=tavily_api_key)
+
+    # We query Tavily with the URL as the search query and request raw content.
+    tavily_results, _ = call_with_resilience(
+        "tavily",
+        lambda timeout: client.search(
+            query=problem_url,
+            include_raw_content=True,
+            max_results=3,
+            search_depth="advanced",
+            timeout=timeout
+        ),
+        state,
+        "ingest",
+        key=cache_key("ingest", problem_url),
+    )
+
+    if not tavily_results or "results" not in tavily_results or len(tavily_results["results"]) == 0:
+        raise ValueError("Tavily returned no results for the given problem URL.")
+
+    # Concatenate the raw content from the top results.
+    raw_texts = [r.get("raw_content") or r.get("content", "") for r in tavily_results["results"]]
+    return "\n".join([t for t in raw_texts if t])
 
 # --- Ingestor Node Function ---
 def ingest_problem_context(state: GraphState) -> GraphState:
     """
     Ingests the problem statement from the URL and populates the problem_context field.
-    This acts as the RAG step to give the LLM external knowledge.
+    This acts as the RAG step to give the LLM external knowledge. Known judges are
+    fetched directly; other sites (or failed fetches) fall back to Tavily search.
     
     Args:
         state (GraphState): The current state of the graph.
@@ -23,27 +60,23 @@ def ingest_problem_context(state: GraphState) -> GraphState:
         raise ValueError("Problem URL is missing from the state.")
 
     try:
-        # Use Tavily to retrieve processed content for the problem URL.
-        tavily_api_key = os.getenv("TAVILY_API_KEY")
-        if not tavily_api_key:
-            raise ValueError("TAVILY_API_KEY is not set in the environment/.env file.")
-
-        client = TavilyClient(api_key=tavily_api_key)
-
-        # We query Tavily with the URL as the search query and request raw content.
-        tavily_results = client.search(
-            query=problem_url,
-            include_raw_content=True,
-            max_results=3,
-            search_depth="advanced"
-        )
-
-        if not tavily_results or "results" not in tavily_results or len(tavily_results["results"]) == 0:
-            raise ValueError("Tavily returned no results for the given problem URL.")
+        # Fetch the statement straight from the judge's page when we have an adapter for it.
+        full_text = None
+        if find_adapter(problem_url) is not None:
+            try:
+                full_text, _ = call_with_resilience(
+                    "problem_site",
+                    lambda timeout: fetch_problem_statement(problem_url, timeout_s=timeout),
+                    state,
+                    "ingest",
+                    key=cache_key("problem_site", problem_url),
+                    hedge=False,
+                )
+            except Exception as e:
+                print(f"Direct fetch failed, falling back to Tavily: {e}")
 
-        # Concatenate the raw content from the top results.
-        raw_texts = [r.get("raw_content") or r.get("content", "") for r in tavily_results["results"]]
-        full_text = "\n".join([t for t in raw_texts if t])
+        if not full_text:
+            full_text = search_with_tavily(problem_url, state)
 
         # Use a text splitter to keep context size manageable for the LLM.
         text_splitter = RecursiveCharacterTextSplitter(
@@ -0,0 +1,43 @@
+from langchain_core.prompts import ChatPromptTemplate
+
+# --- Shared Leading Context Block ---
+# Every node prompt starts with this exact system message, so the problem context and
+# the user's code form an identical token prefix across the Analyzer, Hacker, Tutor and
+# Critic calls. OpenAI caches repeated prompt prefixes (>= 1024 tokens) automatically,
+# so only the role-specific instructions that follow are billed and processed in full.
+SHARED_CONTEXT_BLOCK = (
+    "You are part of Hintforge, a Socratic tutoring agent for competitive programming. "
+    "The problem statement and the student's currently failing solution are given below; "
+    "your specific role and task follow after them."
+    "\n\n---Problem Context---\n{problem_context}"
+    "\n\n---Failing User Code ({language})---\n{user_code}"
+)
+
+
+def build_node_prompt(role_instructions: str, task: str) -> ChatPromptTemplate:
+    """
+    Builds a node prompt that begins with the shared context block.
+
+    Args:
+        role_instructions (str): The node-specific system instructions (placed after the shared block).
+        task (str): The human message describing what the node must return.
+
+    Returns:
+        ChatPromptTemplate: A prompt whose first message is identical for every node.
+    """
+    return ChatPromptTemplate.from_messages(
+        [
+            ("system", SHARED_CONTEXT_BLOCK),
+            ("system", role_instructions),
+            ("human", task),
+        ]
+    )
+
+
+def shared_context_inputs(state) -> dict:
+    """Returns the prompt variables consumed by the shared context block."""
+    return {
+        "problem_context": state["problem_context"],
+        "user_code": state["user_code"],
+        "language": state["language"],
+    }
@@ -0,0 +1,412 @@
+import functools
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Any, Callable, Optional, Tuple
+
+import openai
+import requests
+
+# --- Tail-Latency Control for LLM and Tavily Calls ---
+# Every provider call made by a node goes through call_with_resilience(), which applies:
+#   1. a per-request deadline, spread across the remaining graph nodes by weight,
+#   2. a hedged duplicate request once the call is slower than the provider's recent p95,
+#   3. retries with jittered exponential backoff (bounded by the node's budget),
+#   4. a per-provider circuit breaker that, while open, skips the provider entirely,
+#   5. a fallback to the last cached result for the same inputs, or a degraded output.
+# FaultInjectingProvider is a local stand-in for OpenAI/Tavily that adds latency and errors.
+
+DEFAULT_DEADLINE_S = float(os.getenv("HINTFORGE_DEADLINE_S", "90"))
+DEFAULT_CALL_TIMEOUT_S = 30.0
+
+# Relative share of the request deadline that each node may use
+NODE_WEIGHTS = {"ingest": 1.0, "analyze": 2.0, "diagnose": 2.0, "hacker": 2.0, "tutor": 2.0, "critic": 1.0}
+NODE_ORDER = ["ingest", "analyze", "hacker", "tutor", "critic"]
+# In fused mode one "diagnose" call replaces the Analyzer; the Hacker only runs after it in generator mode
+FUSED_NODE_ORDER = ["ingest", "diagnose", "hacker", "tutor", "critic"]
+
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="hintforge_call")
+
+
+# --- Deadline ---
+def start_deadline(seconds: Optional[float] = None) -> float:
+    """Returns the absolute deadline (time.monotonic() based) for a request starting now."""
+    return time.monotonic() + (seconds if seconds is not None else DEFAULT_DEADLINE_S)
+
+
+def node_budget(state, node: str) -> float:
+    """
+    Computes how many seconds the given node may spend, as its weighted share of the
+    time left until the request deadline. Without a deadline, the default call timeout is used.
+    """
+    deadline_at = state.get("deadline_at") if state else None
+    if deadline_at is None:
+        return DEFAULT_CALL_TIMEOUT_S
+    remaining = deadline_at - time.monotonic()
+    if remaining <= 0:
+        return 0.0
+    order = FUSED_NODE_ORDER if node == "diagnose" else NODE_ORDER
+    pending = order[order.index(node):] if node in order else [node]
+    if node == "diagnose" and not state.get("generator_mode"):
+        pending.remove("hacker")
+    share = NODE_WEIGHTS.get(node, 1.0) / sum(NODE_WEIGHTS.get(n, 1.0) for n in pending)
+    return remaining * share
+
+
+# --- Latency Tracking ---
+class LatencyTracker:
+    """Keeps a window of recent call latencies and answers percentile queries."""
+
+    def __init__(self, window: int = 100):
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency_s: float):
+        with self._lock:
+            self._samples.append(latency_s)
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Returns the q-th percentile (0-100) of the window, or None with too few samples."""
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < 5:
+            return None
+        index = min(len(samples) - 1, int(round(q / 100 * (len(samples) - 1))))
+        return samples[index]
+
+
+# --- Circuit Breaker ---
+class CircuitOpenError(Exception):
+    """Raised when a call is refused because the provider's circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after 'failure_threshold' consecutive failures and refuses calls for
+    'reset_timeout_s'. Afterwards one trial call is let through (half-open); its
+    outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout_s: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_s = reset_timeout_s
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.reset_timeout_s:
+                self.state = "half_open"
+                return True
+            return self.state == "closed"
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = "closed"
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+
+
+# --- Fallback Cache ---
+class ResponseCache:
+    """A small LRU cache of the last good result per (provider, inputs)."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            if key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, key: str, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+def cache_key(*parts) -> str:
+    """Builds a stable cache key from JSON-serializable parts (e.g., a node name and its prompt inputs)."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+# --- Per-Provider Policy ---
+class ProviderPolicy:
+    """Resilience settings and shared state (breaker, latencies) for one provider."""
+
+    def __init__(
+        self,
+        name: str,
+        max_attempts: int = 3,
+        base_backoff_s: float = 0.5,
+        max_backoff_s: float = 8.0,
+        hedge_percentile: float = 95.0,
+        default_hedge_delay_s: float = 10.0,
+        min_hedge_delay_s: float = 0.5,
+        breaker: Optional[CircuitBreaker] = None,
+    ):
+        self.name = name
+        self.max_attempts = max_attempts
+        self.base_backoff_s = base_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.hedge_percentile = hedge_percentile
+        self.default_hedge_delay_s = default_hedge_delay_s
+        self.min_hedge_delay_s = min_hedge_delay_s
+        self.breaker = breaker or CircuitBreaker()
+        self.latencies = LatencyTracker()
+
+    def hedge_delay(self) -> float:
+        """Delay after which a duplicate request is sent: the recent p95 latency, if known."""
+        observed = self.latencies.percentile(self.hedge_percentile)
+        if observed is None:
+            return self.default_hedge_delay_s
+        return max(self.min_hedge_delay_s, observed)
+
+    def backoff(self, attempt: int) -> float:
+        """Full-jitter exponential backoff before retry number 'attempt' (1-based)."""
+        return random.uniform(0, min(self.max_backoff_s, self.base_backoff_s * 2 ** (attempt - 1)))
+
+
+PROVIDERS = {
+    "openai": ProviderPolicy("openai"),
+    "tavily": ProviderPolicy("tavily", max_attempts=2, default_hedge_delay_s=8.0),
+    "problem_site": ProviderPolicy("problem_site", max_attempts=2),
+}
+response_cache = ResponseCache()
+
+
+# --- Error Classification ---
+TRANSIENT_STATUS_CODES = {408, 429}
+
+
+def is_transient(error: BaseException) -> bool:
+    """
+    Tells whether an error is worth retrying: timeouts, connection failures and
+    HTTP 408/429/5xx responses, looking through wrapped causes (e.g., LangChain or
+    Tavily errors raised from the underlying HTTP error). Everything else (auth
+    errors, bad requests, parsing failures) is permanent.
+    """
+    seen = set()
+    current = error
+    while current is not None and id(current) not in seen:
+        seen.add(id(current))
+        if isinstance(current, (TimeoutError, ConnectionError, requests.Timeout, requests.ConnectionError,
+                                openai.APIConnectionError)):
+            return True
+        status = getattr(current, "status_code", None)
+        if status is None:
+            status = getattr(getattr(current, "response", None), "status_code", None)
+        if isinstance(status, int):
+            return status in TRANSIENT_STATUS_CODES or status >= 500
+        if type(current).__name__ == "TimeoutError":  # e.g., tavily.errors.TimeoutError
+            return True
+        current = current.__cause__ or current.__context__
+    return False
+
+
+def _hedged_call(fn: Callable[[float], Any], policy: ProviderPolicy, timeout_s: float, hedge: bool):
+    """
+    Runs fn with a timeout, sending one duplicate if the first call is slower than the hedge delay.
+    fn receives the seconds it has left and must pass them on as its client's request timeout,
+    so calls abandoned here also stop in the background instead of holding a worker.
+    """
+    started = time.monotonic()
+    futures = [_executor.submit(fn, timeout_s)]
+    hedge_at = policy.hedge_delay() if hedge else None
+    last_error = None
+
+    while futures:
+        elapsed = time.monotonic() - started
+        if elapsed >= timeout_s:
+            break
+        wait_for = timeout_s - elapsed
+        if hedge_at is not None and len(futures) == 1 and hedge_at < wait_for:
+            wait_for = max(0.0, hedge_at - elapsed)
+
+        done, _ = wait(futures, timeout=wait_for, return_when=FIRST_COMPLETED)
+        for future in done:
+            futures.remove(future)
+            if future.exception() is None:
+                policy.latencies.record(time.monotonic() - started)
+                return future.result()
+            last_error = future.exception()
+            if not is_transient(last_error):
+                raise last_error
+
+        elapsed = time.monotonic() - started
+        if hedge_at is not None and elapsed >= hedge_at and elapsed < timeout_s:
+            # Slow (or failed) first call: fire the hedged duplicate once
+            print(f"RESILIENCE: hedging slow {policy.name} call after {hedge_at:.2f}s")
+            futures.append(_executor.submit(fn, timeout_s - elapsed))
+            hedge_at = None
+
+    if last_error is not None and not futures:
+        raise last_error
+    policy.latencies.record(timeout_s)
+    raise TimeoutError(f"{policy.name} call exceeded {timeout_s:.2f}s")
+
+
+def call_with_resilience(
+    provider: str,
+    fn: Callable[[float], Any],
+    state=None,
+    node: str = "",
+    key: Optional[str] = None,
+    fallback: Optional[Callable[[], Any]] = None,
+    hedge: bool = True,
+) -> Tuple[Any, str]:
+    """
+    Calls a provider under the request deadline with hedging, retries and a circuit breaker.
+
+    Args:
+        provider (str): The provider name ("openai", "tavily" or "problem_site"), selecting its policy.
+        fn (callable): The call to make. It receives its timeout in seconds and must use it as the
+            client's request timeout (e.g., lambda timeout: chain(timeout).invoke(inputs)).
+        state (GraphState): The graph state; its 'deadline_at' bounds the node's budget.
+        node (str): The calling node's name, used to split the deadline.
+        key (str): Cache key for the inputs; successful results are cached under it and
+            served when the provider is unavailable.
+        fallback (callable): Builds a degraded result if neither the provider nor the cache can answer.
+        hedge (bool): Whether a duplicate request may be sent for slow calls.
+
+    Returns:
+        tuple: (result, source), where source is "provider" for a live call, "cache" for a
+            cached result or "fallback" for the degraded output. Only "provider" results
+            correspond to an actual call (and should be counted in llm_metrics).
+
+    Raises:
+        Exception: A non-transient provider error, immediately; otherwise the last error
+            if no cached or degraded result is available.
+    """
+    policy = PROVIDERS[provider]
+    budget = node_budget(state, node)
+    budget_ends = time.monotonic() + budget
+    last_error: Exception = TimeoutError(f"No time left in the request deadline for {node or provider}.")
+
+    if not policy.breaker.allow():
+        last_error = CircuitOpenError(f"{provider} circuit is open.")
+    else:
+        for attempt in range(1, policy.max_attempts + 1):
+            remaining = budget_ends - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                result = _hedged_call(fn, policy, min(remaining, DEFAULT_CALL_TIMEOUT_S), hedge)
+                policy.breaker.record_success()
+                if key is not None:
+                    response_cache.put(key, result)
+                return result, "provider"
+            except Exception as e:
+                if not is_transient(e):
+                    # Permanent errors say nothing about the provider's health: no retry, no breaker count
+                    raise
+                last_error = e
+                policy.breaker.record_failure()
+                print(f"RESILIENCE: {provider} attempt {attempt} failed for {node or 'call'}: {e}")
+                if not policy.breaker.allow():
+                    break
+                pause = policy.backoff(attempt)
+                if time.monotonic() + pause >= budget_ends:
+                    break
+                time.sleep(pause)
+
+    if key is not None:
+        cached = response_cache.get(key)
+        if cached is not None:
+            print(f"RESILIENCE: serving cached {provider} result for {node or 'call'}.")
+            return cached, "cache"
+    if fallback is not None:
+        print(f"RESILIENCE: serving degraded output for {node or 'call'}.")
+        return fallback(), "fallback"
+    raise last_error
+
+
+# --- Fault-Injecting Fake Provider ---
+class FaultInjectingProvider:
+    """
+    A local stand-in for an LLM or Tavily call with configurable latency and faults.
+    It is callable and supports bind()/with_structured_output(), so it can replace a
+    ChatOpenAI model in a node or a client method (client.search = provider). Like a real
+    client, a call slower than its 'timeout' argument raises TimeoutError when it expires.
+
+    Args:
+        respond (callable): Builds the response from the call's input (default: echo the input).
+        latency_s (float): Base latency of every call.
+        slow_rate (float): Probability that a call takes 'slow_latency_s' instead.
+        slow_latency_s (float): Latency of a slow (tail) call.
+        failure_rate (float): Probability that a call raises 'error'.
+        fail_first (int): Number of initial calls that always fail.
+        error (Exception): The exception raised by failing calls.
+        seed (int): Seed for reproducible fault patterns.
+    """
+
+    def __init__(
+        self,
+        respond: Optional[Callable[[Any], Any]] = None,
+        latency_s: float = 0.0,
+        slow_rate: float = 0.0,
+        slow_latency_s: float = 5.0,
+        failure_rate: float = 0.0,
+        fail_first: int = 0,
+        error: Optional[Exception] = None,
+        seed: Optional[int] = None,
+    ):
+        self.respond = respond or (lambda value: value)
+        self.latency_s = latency_s
+        self.slow_rate = slow_rate
+        self.slow_latency_s = slow_latency_s
+        self.failure_rate = failure_rate
+        self.fail_first = fail_first
+        self.error = error or ConnectionError("Injected provider failure.")
+        self.calls = 0
+        self.timeouts = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, value=None, timeout: Optional[float] = None, **kwargs):
+        with self._lock:
+            self.calls += 1
+            call_number = self.calls
+            slow = self._rng.random() < self.slow_rate
+            fail = call_number <= self.fail_first or self._rng.random() < self.failure_rate
+        latency = self.slow_latency_s if slow else self.latency_s
+        if timeout is not None and latency > timeout:
+            # Behave like a real client with a request timeout: give up when it expires
+            time.sleep(timeout)
+            with self._lock:
+                self.timeouts += 1
+            raise TimeoutError(f"Injected call timed out after {timeout:.2f}s.")
+        time.sleep(latency)
+        if fail:
+            raise self.error
+        return self.respond(kwargs if value is None else value)
+
+    invoke = __call__
+
+    def bind(self, timeout: Optional[float] = None, **kwargs):
+        """Mirrors ChatOpenAI.bind(timeout=...): returns a callable honoring the timeout."""
+        return functools.partial(self.__call__, timeout=timeout)
+
+    def with_structured_output(self, schema=None, timeout: Optional[float] = None, **kwargs):
+        """Mirrors ChatOpenAI.with_structured_output; 'respond' must build the structured result."""
+        return self.bind(timeout=timeout)
@@ -2,6 +2,33 @@ from graph_state import GraphState
 
 MAX_REFLECTIONS = 1
 
+# Where each resubmission mode (see incremental.py) enters the graph
+ENTRY_NODES = {
+    "full": "ingest",
+    "reanalyze": "analyze",
+    "reuse_analysis": "hacker",
+    "followup": "tutor",
+}
+
+def route_entry(state: GraphState) -> str:
+    """
+    Defines the conditional entry point: resubmissions skip the nodes whose
+    output is still valid for the edited code.
+    """
+    mode = state.get("resubmission_mode", "full")
+    print(f"---ENTRY ROUTER: Resubmission mode '{mode}'---")
+    return ENTRY_NODES.get(mode, "ingest")
+
+def route_after_diagnosis(state: GraphState) -> str:
+    """
+    In fused mode the diagnosis already contains a raw counter-example. Generator
+    mode still needs the Hacker to write a script for a large input.
+    """
+    if state.get("generator_mode") and state.get("execution_status") != "ERROR":
+        print("Route: Generator mode. Handing off to the Hacker for a generator script.")
+        return "hacker"
+    return "tutor"
+
 def route_to_reflection(state: GraphState) -> str:
     """
     Defines the conditional edge logic: should we loop back to the Tutor 
@@ -0,0 +1,243 @@
+import atexit
+import contextlib
+import hashlib
+import math
+import mmap
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+from typing import TypedDict, Literal, Optional
+
+try:
+    import resource  # POSIX only
+except ImportError:
+    resource = None
+
+# --- Local Code Runner ---
+# Compiles (if needed) and runs the student's solution in a throwaway working directory
+# with a wall-clock timeout. Compiled binaries are cached by source hash, so re-running
+# the same code on another input does not pay the compile cost again.
+#
+# NOTE: this is NOT a security sandbox. Programs run as the current user on the host,
+# with network and filesystem access. Only CPU time, address space and written file
+# sizes are capped (POSIX rlimits), and the environment is stripped of secrets.
+
+DEFAULT_TIMEOUT_S = 5.0
+COMPILE_TIMEOUT_S = 30.0
+MEMORY_LIMIT_BYTES = 1024 * 1024 * 1024
+# The JVM reserves far more address space than it uses, even with a small heap
+JAVA_MEMORY_LIMIT_BYTES = 4 * 1024 * 1024 * 1024
+MAX_OUTPUT_BYTES = 64 * 1024 * 1024
+MAX_STDERR_BYTES = 64 * 1024
+
+_BUILD_ROOT = tempfile.mkdtemp(prefix="hintforge_build_")
+_CASE_ROOT = tempfile.mkdtemp(prefix="hintforge_cases_")
+# Builds and generated inputs (up to hundreds of MB each) must not outlive the process
+atexit.register(shutil.rmtree, _BUILD_ROOT, ignore_errors=True)
+atexit.register(shutil.rmtree, _CASE_ROOT, ignore_errors=True)
+_build_cache: dict = {}
+
+
+class RunResult(TypedDict):
+    """Outcome of running a program on one input."""
+    status: Literal["OK", "TIMEOUT", "RUNTIME_ERROR", "COMPILE_ERROR", "UNAVAILABLE"]
+    stdout: str
+    stderr: str
+
+
+def _result(status: str, stdout: str = "", stderr: str = "") -> RunResult:
+    return {"status": status, "stdout": stdout, "stderr": stderr}
+
+
+def _build(code: str, language: str):
+    """
+    Prepares a runnable command for the given source code.
+
+    Returns:
+        tuple: (command list, None) on success, or (None, RunResult) if the build failed.
+    """
+    key = hashlib.sha256(f"{language}\n{code}".encode()).hexdigest()
+    if key in _build_cache:
+        return _build_cache[key], None
+
+    build_dir = os.path.join(_BUILD_ROOT, key[:16])
+    os.makedirs(build_dir, exist_ok=True)
+
+    if language == "Python":
+        source = os.path.join(build_dir, "main.py")
+        with open(source, "w") as f:
+            f.write(code)
+        command = [sys.executable, source]
+
+    elif language == "C++":
+        if shutil.which("g++") is None:
+            return None, _result("UNAVAILABLE", stderr="g++ is not installed.")
+        source = os.path.join(build_dir, "main.cpp")
+        binary = os.path.join(build_dir, "main")
+        with open(source, "w") as f:
+            f.write(code)
+        compile_command = ["g++", "-O2", "-std=c++17", "-o", binary, source]
+        command = [binary]
+
+    elif language == "Java":
+        if shutil.which("javac") is None or shutil.which("java") is None:
+            return None, _result("UNAVAILABLE", stderr="javac/java is not installed.")
+        match = re.search(r"public\s+(?:final\s+)?class\s+(\w+)", code)
+        class_name = match.group(1) if match else "Main"
+        source = os.path.join(build_dir, f"{class_name}.java")
+        with open(source, "w") as f:
+            f.write(code)
+        compile_command = ["javac", source]
+        command = ["java", "-Xmx512m", "-XX:+UseSerialGC", "-cp", build_dir, class_name]
+
+    else:
+        return None, _result("UNAVAILABLE", stderr=f"Unsupported language: {language}")
+
+    if language in ("C++", "Java"):
+        try:
+            compiled = subprocess.run(
+                compile_command, capture_output=True, text=True, timeout=COMPILE_TIMEOUT_S
+            )
+        except subprocess.TimeoutExpired:
+            return None, _result("COMPILE_ERROR", stderr="Compilation timed out.")
+        if compiled.returncode != 0:
+            return None, _result("COMPILE_ERROR", stderr=compiled.stderr)
+
+    _build_cache[key] = command
+    return command, None
+
+
+# The limits are set inside the child by a tiny launcher that then exec()s the program.
+# subprocess's preexec_fn would be simpler, but it is unsafe in a multithreaded parent
+# (the child can deadlock before exec), and the app always runs Streamlit and
+# resilience worker threads.
+_LIMIT_LAUNCHER = (
+    "import os, resource, sys\n"
+    "cpu, memory, max_file = (int(v) for v in sys.argv[1:4])\n"
+    "resource.setrlimit(resource.RLIMIT_CPU, (cpu, cpu))\n"
+    "resource.setrlimit(resource.RLIMIT_AS, (memory, memory))\n"
+    "resource.setrlimit(resource.RLIMIT_FSIZE, (max_file, max_file))\n"
+    "os.execvp(sys.argv[4], sys.argv[4:])\n"
+)
+
+
+def _with_resource_limits(command: list, cpu_s: float, memory_bytes: int, max_file_bytes: int) -> list:
+    """
+    Wraps a command so that the child caps its own CPU time, address space and the size
+    of any file it writes before running the program (POSIX only). Without the resource
+    module the command is returned unchanged and no limits are applied.
+    """
+    if resource is None:
+        return command
+    cpu = int(math.ceil(cpu_s)) + 1
+    return [sys.executable, "-I", "-S", "-c", _LIMIT_LAUNCHER,
+            str(cpu), str(memory_bytes), str(max_file_bytes), *command]
+
+
+def run_code(
+    code: str,
+    language: str,
+    stdin_text: str = "",
+    timeout_s: Optional[float] = None,
+    stdin_path: Optional[str] = None,
+    stdout_path: Optional[str] = None,
+    max_output_bytes: Optional[int] = None,
+) -> RunResult:
+    """
+    Runs the code on the given input and captures its output.
+
+    Args:
+        code (str): The program source.
+        language (str): One of "C++", "Python", "Java".
+        stdin_text (str): The input fed to the program (ignored if stdin_path is given).
+        timeout_s (float): Wall-clock limit for the run (defaults to DEFAULT_TIMEOUT_S).
+        stdin_path (str): A file streamed to the program's stdin instead of stdin_text.
+        stdout_path (str): A file the program's stdout is streamed into; the returned
+            stdout is then empty, so large outputs never pass through memory.
+        max_output_bytes (int): Upper bound on the size of any file the program writes,
+            its stdout included (defaults to MAX_OUTPUT_BYTES).
+
+    Returns:
+        RunResult: The run status together with stdout and stderr.
+    """
+    command, failure = _build(code, language)
+    if failure is not None:
+        return failure
+
+    timeout_s = timeout_s or DEFAULT_TIMEOUT_S
+    max_output_bytes = max_output_bytes or MAX_OUTPUT_BYTES
+    memory_bytes = JAVA_MEMORY_LIMIT_BYTES if language == "Java" else MEMORY_LIMIT_BYTES
+
+    # Each run gets its own empty working directory and a minimal environment
+    # (no API keys), both removed/discarded afterwards.
+    work_dir = tempfile.mkdtemp(prefix="run_", dir=_BUILD_ROOT)
+    env = {"PATH": os.environ.get("PATH", "/usr/bin:/bin"), "HOME": work_dir, "LANG": "C.UTF-8"}
+    try:
+        with contextlib.ExitStack() as stack:
+            stdin_file = stack.enter_context(open(stdin_path, "rb")) if stdin_path else None
+            # stdout always goes to a file so the size cap applies to it as well
+            captured_path = stdout_path or os.path.join(work_dir, "stdout")
+            stdout_file = stack.enter_context(open(captured_path, "wb"))
+            stderr_path = os.path.join(work_dir, "stderr")
+            stderr_file = stack.enter_context(open(stderr_path, "wb"))
+            try:
+                completed = subprocess.run(
+                    _with_resource_limits(command, timeout_s, memory_bytes, max_output_bytes),
+                    input=None if stdin_file else stdin_text.encode(),
+                    stdin=stdin_file,
+                    stdout=stdout_file,
+                    stderr=stderr_file,
+                    timeout=timeout_s,
+                    cwd=work_dir,
+                    env=env,
+                )
+            except subprocess.TimeoutExpired:
+                return _result("TIMEOUT", stderr=f"Exceeded {timeout_s}s.")
+
+        stdout = ""
+        if stdout_path is None:
+            with open(captured_path, "rb") as f:
+                stdout = f.read().decode(errors="replace")
+        with open(stderr_path, "rb") as f:
+            f.seek(max(0, os.path.getsize(stderr_path) - MAX_STDERR_BYTES))
+            stderr = f.read().decode(errors="replace")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if completed.returncode != 0:
+        return _result("RUNTIME_ERROR", stdout, stderr)
+    return _result("OK", stdout, stderr)
+
+
+# --- Large Files (generated inputs) ---
+# Generated counter-examples can be hundreds of megabytes. Programs read them as a
+# streamed stdin, and previews go through a memory map, so only the bytes actually
+# read are paged in instead of loading whole files.
+
+def file_preview(path: str, max_chars: int = 500) -> str:
+    """Returns the first max_chars characters of a file, noting the total size if truncated."""
+    size = os.path.getsize(path)
+    if size == 0:
+        return ""
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        head = mapped[:max_chars].decode(errors="replace")
+    if size > max_chars:
+        head += f"\n... ({size:,} bytes in total, truncated)"
+    return head
+
+
+def new_case_path(suffix: str = ".txt") -> str:
+    """Allocates a file path for a generated input or a program output."""
+    fd, path = tempfile.mkstemp(prefix="case_", suffix=suffix, dir=_CASE_ROOT)
+    os.close(fd)
+    return path
+
+
+def discard_case(path: Optional[str]):
+    """Deletes a generated input file once no attempt refers to it any more."""
+    if path:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(path)
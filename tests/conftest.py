@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The modules live at the repository root and build their OpenAI clients at import time.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+os.environ.setdefault("OPENAI_API_KEY", "test-key")
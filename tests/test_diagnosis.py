@@ -0,0 +1,43 @@
+from langchain_core.messages import AIMessage
+
+import diagnosis_node
+from graph_state import Diagnosis
+from resilience import FaultInjectingProvider
+
+STATE = {
+    "problem_context": "Print the largest pair sum.",
+    "user_code": "for i in range(n):\n    for j in range(n):\n        best = max(best, a[i] + a[j])",
+    "language": "Python",
+    "execution_status": "FAIL",
+}
+
+
+def structured_reply(parsed, parsing_error=None):
+    raw = AIMessage(content="", usage_metadata={"input_tokens": 1200, "output_tokens": 40, "total_tokens": 1240})
+    return FaultInjectingProvider(respond=lambda _: {"raw": raw, "parsed": parsed, "parsing_error": parsing_error})
+
+
+def test_diagnosis_fills_analysis_region_and_test_case(monkeypatch):
+    diagnosis = Diagnosis(
+        analysis="TLE: O(N^2) pair loop, needs O(N log N).",
+        counter_example_input="  3\n1 2 3\n",
+        suspect_code=["for j in range(n):"],
+    )
+    monkeypatch.setattr(diagnosis_node, "base_llm_diagnosis", structured_reply(diagnosis))
+
+    update = diagnosis_node.diagnose_and_hack(dict(STATE))
+
+    assert update["execution_output"] == diagnosis.analysis
+    assert update["diagnosed_region"] == ["for j in range(n):"]
+    assert update["generated_test_case"] == "3\n1 2 3"
+    assert update["execution_status"] == "FAIL"
+    assert [(m["node"], m["input_tokens"]) for m in update["llm_metrics"]] == [("diagnose", 1200)]
+
+
+def test_unparsed_diagnosis_is_an_error(monkeypatch):
+    monkeypatch.setattr(diagnosis_node, "base_llm_diagnosis", structured_reply(None, "missing field"))
+
+    update = diagnosis_node.diagnose_and_hack(dict(STATE))
+
+    assert update["execution_status"] == "ERROR"
+    assert "missing field" in update["final_response"]
@@ -0,0 +1,104 @@
+import os
+import time
+
+import pytest
+from langchain_core.messages import AIMessage
+
+import hacker_node
+import sandbox_runner
+from resilience import FaultInjectingProvider, start_deadline
+from sandbox_runner import file_preview
+
+
+def test_generator_run_is_bounded_by_its_timeout():
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="TIMEOUT"):
+        hacker_node.run_generator("import time\ntime.sleep(30)\n", timeout_s=0.5)
+    assert time.monotonic() - started < 5
+
+
+def test_generator_uses_the_hacker_budget(monkeypatch):
+    generator = "import time\ntime.sleep(30)\nprint(1)\n"
+    monkeypatch.setattr(hacker_node, "llm_hacker", FaultInjectingProvider(respond=lambda _: AIMessage(content=generator)))
+
+    started = time.monotonic()
+    update = hacker_node.generate_test_case({
+        "problem_context": "Sum the numbers.",
+        "user_code": "print(1)",
+        "language": "Python",
+        "execution_status": "FAIL",
+        "execution_output": "TLE",
+        "generator_mode": True,
+        "deadline_at": start_deadline(2.0),
+    })
+
+    # Far below the fixed GENERATOR_TIMEOUT_S
+    assert time.monotonic() - started < 5
+    assert update["execution_status"] == "ERROR"
+
+
+def test_generator_gets_what_is_left_of_the_hacker_share(monkeypatch):
+    timeouts = []
+
+    def fake_run_generator(code, timeout_s):
+        timeouts.append(timeout_s)
+        raise RuntimeError("not run")
+
+    monkeypatch.setattr(hacker_node, "run_generator", fake_run_generator)
+    monkeypatch.setattr(hacker_node, "llm_hacker", FaultInjectingProvider(
+        respond=lambda _: AIMessage(content="print(1)"), latency_s=1.0,
+    ))
+
+    hacker_node.generate_test_case({
+        "problem_context": "Sum the numbers.",
+        "user_code": "print(1)",
+        "language": "Python",
+        "execution_status": "FAIL",
+        "execution_output": "TLE",
+        "generator_mode": True,
+        "deadline_at": start_deadline(5.0),
+    })
+
+    # The Hacker's share is 2/5 of 5s; the 1s LLM call leaves about 1s of it
+    # (re-splitting the remaining 4s would give 1.6s and eat into the Tutor's time).
+    assert timeouts and timeouts[0] == pytest.approx(1.0, abs=0.2)
+
+
+def test_generated_input_is_streamed_to_a_case_file(monkeypatch):
+    generator = "import sys\nsys.stdout.write('7 ' * 500_000)\n"  # 1 MB
+    monkeypatch.setattr(hacker_node, "llm_hacker", FaultInjectingProvider(respond=lambda _: AIMessage(content=generator)))
+
+    update = hacker_node.generate_test_case({
+        "problem_context": "Sum the numbers.",
+        "user_code": "print(1)",
+        "language": "Python",
+        "execution_status": "FAIL",
+        "execution_output": "TLE",
+        "generator_mode": True,
+    })
+
+    path = update["test_case_path"]
+    try:
+        assert os.path.dirname(path) == sandbox_runner._CASE_ROOT
+        assert update["test_case_size"] == os.path.getsize(path) == 1_000_000
+        assert update["test_case_preview"].startswith("7 " * (hacker_node.PREVIEW_CHARS // 2))
+        assert update["test_case_preview"].endswith("\n... (1,000,000 bytes in total, truncated)")
+        # Only the preview enters the state, never the full input
+        assert update["generated_test_case"] == update["test_case_preview"]
+        assert len(update["generated_test_case"]) < 600
+        assert update["generator_code"] == generator.strip()
+    finally:
+        os.remove(path)
+
+
+def test_file_preview_truncates_only_long_files(tmp_path):
+    short = tmp_path / "short.txt"
+    short.write_text("1 2 3\n")
+    long = tmp_path / "long.txt"
+    long.write_text("x" * 2000)
+
+    assert file_preview(str(short)) == "1 2 3\n"
+    assert file_preview(str(long), max_chars=10) == "x" * 10 + "\n... (2,000 bytes in total, truncated)"
+    empty = tmp_path / "empty.txt"
+    empty.touch()
+    assert file_preview(str(empty)) == ""
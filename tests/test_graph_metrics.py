@@ -0,0 +1,27 @@
+from langchain_core.messages import AIMessage
+
+import analyzer_node
+import hacker_node
+import tutor_node
+from hintforge_agent import build_hintforge_graph
+from resilience import FaultInjectingProvider
+
+
+def test_skipped_nodes_do_not_duplicate_llm_metrics(monkeypatch):
+    monkeypatch.setattr(analyzer_node, "llm", FaultInjectingProvider(respond=lambda _: AIMessage(content="TLE")))
+    monkeypatch.setattr(hacker_node, "llm_hacker", FaultInjectingProvider(respond=lambda _: AIMessage(content="1\n5")))
+    # A non-transient failure makes the Tutor report ERROR; the Critic then skips.
+    monkeypatch.setattr(tutor_node, "base_llm_tutor", FaultInjectingProvider(failure_rate=1.0, error=ValueError("bad request")))
+
+    final_state = build_hintforge_graph().invoke({
+        "problem_url": "https://example.com/p",
+        "problem_context": "Sum the numbers.",
+        "user_code": "print(1)",
+        "language": "Python",
+        "reflection_count": 0,
+        "resubmission_mode": "reanalyze",
+        "execution_status": "FAIL",
+    })
+
+    assert final_state["execution_status"] == "ERROR"
+    assert [m["node"] for m in final_state["llm_metrics"]] == ["analyze", "hacker"]
@@ -0,0 +1,104 @@
+import os
+
+from graph_state import Hint
+from incremental import SessionHistory, plan_resubmission
+from sandbox_runner import new_case_path
+
+SLOW = (
+    "n = int(input())\n"
+    "a = list(map(int, input().split()))\n"
+    "best = 0\n"
+    "for i in range(n):\n"
+    "    for j in range(i + 1, n):\n"
+    "        best = max(best, a[i] + a[j])\n"
+    "print(best)\n"
+)
+FIXED = (
+    "n = int(input())\n"
+    "a = sorted(map(int, input().split()))\n"
+    "print(a[-1] + a[-2])\n"
+)
+CRASHING = (
+    "n = int(input())\n"
+    "a = list(map(int, input().split()))\n"
+    "print(a[n])\n"
+)
+CRASHING_EDITED = CRASHING.replace("print(a[n])", "print(a[n] * 2)")
+
+
+def previous_attempt(**overrides):
+    state = {
+        "problem_url": "https://example.com/p",
+        "language": "Python",
+        "problem_context": "Print the largest pair sum.",
+        "user_code": SLOW,
+        "generated_test_case": "3\n1 2 3",
+        "execution_output": "TLE: O(N^2) pair loop, needs O(N log N).",
+        "diagnosed_region": ["for j in range(i + 1, n):"],
+        "current_hint": Hint(analysis="TLE", counter_example_input="3\n1 2 3",
+                             socratic_hint="How many pairs do you check?", complexity_advice=None),
+        "execution_status": "FAIL",
+    }
+    state.update(overrides)
+    return state
+
+
+def test_first_attempt_runs_full_graph():
+    assert plan_resubmission(None, "https://example.com/p", SLOW, "Python")["resubmission_mode"] == "full"
+
+
+def test_correct_fix_with_same_output_is_not_a_followup():
+    plan = plan_resubmission(previous_attempt(), "https://example.com/p", FIXED, "Python")
+    assert plan["resubmission_mode"] == "reanalyze"
+    assert "feedback" not in plan
+
+
+def test_crash_on_previous_counter_example_goes_to_followup():
+    previous = previous_attempt(user_code=CRASHING)
+    plan = plan_resubmission(previous, "https://example.com/p", CRASHING_EDITED, "Python")
+    assert plan["resubmission_mode"] == "followup"
+    assert "runtime error" in plan["feedback"]
+
+
+def test_crash_the_old_code_did_not_have_is_not_a_followup():
+    # The old code ran fine on the input, so the crash says nothing about the diagnosed flaw
+    plan = plan_resubmission(previous_attempt(), "https://example.com/p", CRASHING, "Python")
+    assert plan["resubmission_mode"] == "reanalyze"
+
+
+def test_followups_are_not_chained_on_the_same_input():
+    previous = previous_attempt(user_code=CRASHING, resubmission_mode="followup")
+    plan = plan_resubmission(previous, "https://example.com/p", CRASHING_EDITED, "Python")
+    assert plan["resubmission_mode"] == "reanalyze"
+    assert "feedback" not in plan
+
+
+def test_edit_outside_diagnosed_region_reuses_analysis():
+    edited = SLOW.replace("print(best)", "print(best )")
+    plan = plan_resubmission(previous_attempt(), "https://example.com/p", edited, "Python")
+    assert plan["resubmission_mode"] == "reuse_analysis"
+    assert plan["execution_output"].startswith("TLE")
+
+
+def test_generated_input_on_disk_is_streamed(tmp_path):
+    case = tmp_path / "case.txt"
+    case.write_text("3\n1 2 3\n")
+    state = previous_attempt(user_code=CRASHING, test_case_path=str(case), generated_test_case="3\n1 2 3 (preview)")
+    assert plan_resubmission(state, "https://example.com/p", CRASHING_EDITED, "Python")["resubmission_mode"] == "followup"
+    assert plan_resubmission(state, "https://example.com/p", FIXED, "Python")["resubmission_mode"] == "reanalyze"
+
+
+def test_superseded_and_cleared_attempts_delete_their_generated_inputs():
+    history = SessionHistory()
+    first = new_case_path()
+    history.record(previous_attempt(test_case_path=first))
+    # A follow-up keeps using the same counter-example file
+    history.record(previous_attempt(test_case_path=first))
+    assert os.path.exists(first)
+
+    second = new_case_path()
+    history.record(previous_attempt(test_case_path=second))
+    assert not os.path.exists(first)
+
+    history.clear()
+    assert not os.path.exists(second)
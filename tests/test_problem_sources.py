@@ -0,0 +1,200 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+import ingestor_node
+import problem_sources
+import resilience
+from problem_sources import (
+    AtCoderAdapter,
+    CodeforcesAdapter,
+    ConditionalHttpClient,
+    LeetCodeAdapter,
+    fetch_problem_statement,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+LOCAL = ("127.0.0.1",)
+
+PAGES = {
+    "/problemset/problem/4/A": ("codeforces_problem.html", '"cf-4a-v1"'),
+    "/contests/abc086/tasks/abc086_a": ("atcoder_task.html", None),
+}
+
+
+class JudgeHandler(BaseHTTPRequestHandler):
+    """Serves saved judge pages (with an ETag) and the LeetCode GraphQL response."""
+
+    def do_GET(self):
+        self.server.requests.append(("GET", self.path, dict(self.headers), None))
+        if self.path not in PAGES:
+            self.send_error(404)
+            return
+        name, etag = PAGES[self.path]
+        if etag and self.headers.get("If-None-Match") == etag:
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self._reply((FIXTURES / name).read_bytes(), "text/html; charset=utf-8", etag)
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(("POST", self.path, dict(self.headers), body))
+        if self.path != "/graphql":
+            self.send_error(404)
+            return
+        self._reply((FIXTURES / "leetcode_graphql.json").read_bytes(), "application/json")
+
+    def _reply(self, payload: bytes, content_type: str, etag=None):
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        if etag:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def judge_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), JudgeHandler)
+    server.requests = []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server, path: str) -> str:
+    return f"http://127.0.0.1:{server.server_address[1]}{path}"
+
+
+@pytest.fixture
+def local_judges(monkeypatch):
+    """Points the adapters at the local server and isolates the HTTP client and resilience state."""
+    monkeypatch.setattr(problem_sources, "ADAPTERS", [
+        CodeforcesAdapter(domains=LOCAL), AtCoderAdapter(domains=LOCAL), LeetCodeAdapter(domains=LOCAL),
+    ])
+    monkeypatch.setattr(problem_sources, "http_client", ConditionalHttpClient(timeout_s=5))
+    monkeypatch.setattr(resilience, "response_cache", resilience.ResponseCache())
+    for name in ("problem_site", "tavily"):
+        monkeypatch.setitem(resilience.PROVIDERS, name, resilience.ProviderPolicy(name, max_attempts=1))
+
+
+def test_codeforces_statement_is_extracted(judge_server):
+    text = CodeforcesAdapter(domains=LOCAL).fetch_statement(
+        url(judge_server, "/problemset/problem/4/A"), ConditionalHttpClient()
+    )
+
+    assert text.startswith("A. Watermelon")
+    assert "weighing w kilos." in text
+    assert "1 ≤ w ≤ 100" in text
+    assert "Codeforces (c)" not in text  # page chrome outside the statement is dropped
+
+
+def test_atcoder_statement_prefers_english(judge_server):
+    text = AtCoderAdapter(domains=LOCAL).fetch_statement(
+        url(judge_server, "/contests/abc086/tasks/abc086_a"), ConditionalHttpClient()
+    )
+
+    assert text.startswith("Problem Statement")
+    assert "Determine whether the product of a and b is even or odd." in text
+    assert "問題文" not in text
+
+
+def test_leetcode_statement_comes_from_graphql(judge_server):
+    problem = url(judge_server, "/problems/two-sum/description/")
+    text = LeetCodeAdapter(domains=LOCAL).fetch_statement(problem, ConditionalHttpClient())
+
+    assert text.startswith("Two Sum\nGiven an array of integers nums")
+    assert "return indices of the two numbers such that they add up to target." in text
+    assert "Input: nums = [2,7,11,15], target = 9" in text
+    method, path, headers, body = judge_server.requests[-1]
+    assert (method, path) == ("POST", "/graphql")
+    assert body["variables"] == {"titleSlug": "two-sum"}
+    assert headers["Referer"] == problem
+
+
+def test_unchanged_page_is_revalidated_with_etag(judge_server):
+    client = ConditionalHttpClient()
+    page = url(judge_server, "/problemset/problem/4/A")
+
+    first = client.get_text(page)
+    second = client.get_text(page)
+
+    assert second == first
+    assert "If-None-Match" not in judge_server.requests[0][2]
+    assert judge_server.requests[1][2]["If-None-Match"] == '"cf-4a-v1"'
+
+
+def test_changed_page_replaces_cached_body(judge_server, monkeypatch):
+    client = ConditionalHttpClient()
+    page = url(judge_server, "/problemset/problem/4/A")
+    client.get_text(page)
+
+    monkeypatch.setitem(PAGES, "/problemset/problem/4/A", ("atcoder_task.html", '"cf-4a-v2"'))
+    assert "AtCoDeer" in client.get_text(page)
+    assert "AtCoDeer" in client.get_text(page)
+    assert judge_server.requests[2][2]["If-None-Match"] == '"cf-4a-v2"'
+
+
+def test_unsupported_site_is_not_fetched(judge_server, local_judges):
+    assert fetch_problem_statement("https://example.org/problem/1") is None
+    assert judge_server.requests == []
+
+
+class FakeTavilyClient:
+    searches = []
+
+    def __init__(self, api_key):
+        pass
+
+    def search(self, **kwargs):
+        FakeTavilyClient.searches.append(kwargs)
+        return {"results": [{"raw_content": "Statement found by search."}]}
+
+
+@pytest.fixture
+def fake_tavily(monkeypatch):
+    FakeTavilyClient.searches = []
+    monkeypatch.setenv("TAVILY_API_KEY", "test-key")
+    monkeypatch.setattr(ingestor_node, "TavilyClient", FakeTavilyClient)
+    return FakeTavilyClient.searches
+
+
+def test_ingestor_fetches_known_judge_directly(judge_server, local_judges, fake_tavily):
+    update = ingestor_node.ingest_problem_context({"problem_url": url(judge_server, "/problemset/problem/4/A")})
+
+    assert "A. Watermelon" in update["problem_context"]
+    assert fake_tavily == []
+
+
+def test_ingestor_falls_back_to_tavily_without_adapter(judge_server, local_judges, fake_tavily):
+    update = ingestor_node.ingest_problem_context({"problem_url": "https://example.org/problem/1"})
+
+    assert update["problem_context"] == "Statement found by search."
+    assert fake_tavily[0]["query"] == "https://example.org/problem/1"
+    assert fake_tavily[0]["timeout"] > 0
+    assert judge_server.requests == []
+
+
+def test_ingestor_falls_back_to_tavily_when_fetch_fails(judge_server, local_judges, fake_tavily):
+    missing = url(judge_server, "/problemset/problem/999/Z")
+    update = ingestor_node.ingest_problem_context({"problem_url": missing})
+
+    assert update["problem_context"] == "Statement found by search."
+    assert [r[1] for r in judge_server.requests] == ["/problemset/problem/999/Z"]
+    assert fake_tavily[0]["query"] == missing
+
+
+def test_adapters_must_implement_fetch_statement():
+    with pytest.raises(TypeError):
+        problem_sources.ProblemAdapter()
@@ -0,0 +1,30 @@
+from analyzer_node import analyzer_prompt
+from critic_node import critic_prompt
+from hacker_node import hacker_prompt
+from prompt_context import shared_context_inputs
+from tutor_node import tutor_prompt
+
+STATE = {
+    "problem_context": "Print the largest pair sum.",
+    "user_code": "print(max(a) * 2)",
+    "language": "Python",
+}
+
+
+def render(prompt):
+    # Node-specific variables get a per-prompt value, so only the shared block can match
+    inputs = {name: f"<{name} for {id(prompt)}>" for name in prompt.input_variables}
+    inputs.update(shared_context_inputs(STATE))
+    return prompt.format_messages(**inputs)
+
+
+def test_every_node_prompt_starts_with_the_same_message():
+    first_messages = {render(p)[0].content for p in (analyzer_prompt, hacker_prompt, tutor_prompt, critic_prompt)}
+
+    assert len(first_messages) == 1
+    shared = first_messages.pop()
+    assert STATE["problem_context"] in shared and STATE["user_code"] in shared
+
+
+def test_node_instructions_follow_the_shared_message():
+    assert render(analyzer_prompt)[1].content != render(tutor_prompt)[1].content
@@ -0,0 +1,110 @@
+import time
+
+import pytest
+
+import analyzer_node
+import resilience
+from resilience import CircuitBreaker, FaultInjectingProvider, ProviderPolicy, call_with_resilience, start_deadline
+
+
+class BadRequest(Exception):
+    status_code = 400
+
+
+@pytest.fixture(autouse=True)
+def fresh_providers(monkeypatch):
+    policy = ProviderPolicy(
+        "fake",
+        max_attempts=3,
+        base_backoff_s=0.01,
+        default_hedge_delay_s=0.2,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout_s=60),
+    )
+    monkeypatch.setitem(resilience.PROVIDERS, "openai", policy)
+    monkeypatch.setattr(resilience, "response_cache", resilience.ResponseCache())
+    return policy
+
+
+def test_transient_failure_is_retried():
+    provider = FaultInjectingProvider(respond=lambda v: "ok", fail_first=1)
+
+    result, source = call_with_resilience("openai", lambda timeout: provider("x", timeout=timeout))
+
+    assert (result, source) == ("ok", "provider")
+    assert provider.calls == 2
+
+
+def test_permanent_failure_is_raised_without_retry_or_breaker_count(fresh_providers):
+    provider = FaultInjectingProvider(failure_rate=1.0, error=BadRequest("bad request"))
+
+    with pytest.raises(BadRequest):
+        call_with_resilience("openai", lambda timeout: provider("x", timeout=timeout), fallback=lambda: "degraded")
+
+    assert provider.calls == 1
+    assert fresh_providers.breaker.state == "closed"
+
+
+def test_slow_call_is_hedged():
+    slow = FaultInjectingProvider(respond=lambda v: "slow", latency_s=2.0)
+    fast = FaultInjectingProvider(respond=lambda v: "fast")
+
+    def call(timeout):
+        # The first request hits a slow replica, the hedged duplicate a fast one
+        provider = fast if slow.calls else slow
+        return provider("x", timeout=timeout)
+
+    started = time.monotonic()
+    result, source = call_with_resilience("openai", call)
+
+    assert (result, source) == ("fast", "provider")
+    assert (slow.calls, fast.calls) == (1, 1)
+    assert time.monotonic() - started < 1.5
+
+
+def test_client_timeout_stops_the_call():
+    provider = FaultInjectingProvider(latency_s=5.0)
+    state = {"deadline_at": start_deadline(0.5)}
+
+    with pytest.raises(TimeoutError):
+        call_with_resilience("openai", lambda timeout: provider("x", timeout=timeout), state, "critic", hedge=False)
+
+    # The abandoned call gave up at its timeout instead of running for its full latency
+    deadline = time.monotonic() + 1.0
+    while provider.timeouts < provider.calls and time.monotonic() < deadline:
+        time.sleep(0.02)
+    assert provider.timeouts == provider.calls
+
+
+def test_open_breaker_serves_cache_then_fallback(fresh_providers):
+    healthy = FaultInjectingProvider(respond=lambda v: "fresh")
+    assert call_with_resilience("openai", lambda t: healthy("x", timeout=t), key="k") == ("fresh", "provider")
+
+    down = FaultInjectingProvider(failure_rate=1.0)
+    assert call_with_resilience("openai", lambda t: down("x", timeout=t), key="k") == ("fresh", "cache")
+    assert fresh_providers.breaker.state == "open"
+
+    calls = down.calls
+    result = call_with_resilience("openai", lambda t: down("x", timeout=t), key="other", fallback=lambda: "degraded")
+    assert result == ("degraded", "fallback")
+    assert down.calls == calls  # the open circuit skipped the provider
+
+
+def test_degraded_result_is_not_recorded_as_llm_call(monkeypatch):
+    monkeypatch.setattr(analyzer_node, "llm", FaultInjectingProvider(failure_rate=1.0))
+
+    update = analyzer_node.analyze_logic({
+        "problem_context": "Sum the numbers.",
+        "user_code": "print(1)",
+        "language": "Python",
+        "execution_status": "FAIL",
+    })
+
+    assert "Undetermined flaw." in update["execution_output"]
+    assert update["llm_metrics"] == []
+
+
+def test_fused_diagnosis_budget_skips_the_hacker_unless_it_runs():
+    state = {"deadline_at": start_deadline(70.0)}
+
+    assert resilience.node_budget(state, "diagnose") == pytest.approx(70.0 * 2 / 5, abs=0.1)
+    assert resilience.node_budget({**state, "generator_mode": True}, "diagnose") == pytest.approx(70.0 * 2 / 7, abs=0.1)
@@ -0,0 +1,23 @@
+import pytest
+
+import sandbox_runner
+from sandbox_runner import MEMORY_LIMIT_BYTES, run_code
+
+pytestmark = pytest.mark.skipif(sandbox_runner.resource is None, reason="resource limits are POSIX only")
+
+
+def test_limits_are_applied_inside_the_child():
+    program = (
+        "import resource\n"
+        "print(resource.getrlimit(resource.RLIMIT_AS)[0], resource.getrlimit(resource.RLIMIT_FSIZE)[0],"
+        " resource.getrlimit(resource.RLIMIT_CPU)[0])\n"
+    )
+    result = run_code(program, "Python", timeout_s=2, max_output_bytes=4096)
+
+    assert result["status"] == "OK"
+    assert result["stdout"].split() == [str(MEMORY_LIMIT_BYTES), "4096", "3"]
+
+
+def test_exceeding_the_limits_is_a_runtime_error():
+    assert run_code("x = bytearray(2 * 1024 ** 3)", "Python")["status"] == "RUNTIME_ERROR"
+    assert run_code("print('x' * 10000)", "Python", max_output_bytes=4096)["status"] == "RUNTIME_ERROR"
@@ -1,38 +1,37 @@
 import os
+import time
 from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
 from typing import Annotated
 from graph_state import GraphState, Hint  # Import the Hint schema
+from prompt_context import build_node_prompt, shared_context_inputs
+from call_metrics import record_llm_call_if_live
+from resilience import call_with_resilience, cache_key, DEFAULT_CALL_TIMEOUT_S
 
 # --- Model Initialization ---
 # Using a standard model for text generation with structured Pydantic output
-base_llm_tutor = ChatOpenAI(model="gpt-4o-mini", temperature=0.5)
-# Let LangChain / OpenAI handle structured output tool-calling into the Hint model
-llm_tutor = base_llm_tutor.with_structured_output(Hint)
+base_llm_tutor = ChatOpenAI(model="gpt-4o-mini", temperature=0.5, timeout=DEFAULT_CALL_TIMEOUT_S, max_retries=0)
+
+
+def structured_tutor(timeout: float):
+    """
+    Lets LangChain / OpenAI handle structured output into the Hint model, with a per-call
+    request timeout. include_raw keeps the raw AIMessage so its token usage can be recorded.
+    """
+    return base_llm_tutor.with_structured_output(Hint, include_raw=True, timeout=timeout)
 
 # --- Tutor Node Prompt ---
-tutor_prompt = ChatPromptTemplate.from_messages(
-    [
-        (
-            "system",
-            "You are the **Socratic Tutor** for Hintforge. Your goal is to guide the student "
-            "towards the correct solution without giving away the answer (NO SPOILERS).\n\n"
-            "Given the problem context, the student's failing code, the internal diagnosis of "
-            "the flaw, and a counter-example input, you must produce a structured hint that "
-            "matches the Hint schema (fields: analysis, counter_example_input, socratic_hint, "
-            "complexity_advice)."
-        ),
-        (
-            "human",
-            "Use the following information to fill in the Hint fields:\n\n"
-            "---Problem Context---\n{problem_context}\n\n"
-            "---Failing User Code ({language})---\n{user_code}\n\n"
-            "---Internal Diagnosis---\n{execution_output}\n\n"
-            "---Generated Counter-Example---\n{generated_test_case}\n\n"
-            "---Critique Feedback (if regenerating)---\n{feedback}\n\n"
-            "Return a helpful, non-spoiler hint."
-        ),
-    ]
+tutor_prompt = build_node_prompt(
+    "You are the **Socratic Tutor** for Hintforge. Your goal is to guide the student "
+    "towards the correct solution without giving away the answer (NO SPOILERS).\n\n"
+    "Given the problem context, the student's failing code, the internal diagnosis of "
+    "the flaw, and a counter-example input, you must produce a structured hint that "
+    "matches the Hint schema (fields: analysis, counter_example_input, socratic_hint, "
+    "complexity_advice).",
+    "Use the following information to fill in the Hint fields:\n\n"
+    "---Internal Diagnosis---\n{execution_output}\n\n"
+    "---Generated Counter-Example---\n{generated_test_case}\n\n"
+    "---Critique Feedback (if regenerating)---\n{feedback}\n\n"
+    "Return a helpful, non-spoiler hint."
 )
 
 # --- Tutor Node Function ---
@@ -50,23 +49,27 @@ def generate_socratic_hint(state: GraphState) -> GraphState:
     
     if state.get("execution_status") == "ERROR":
         print("Skipping hint generation due to previous error.")
-        return state
-    # Chain prompt -> structured LLM (returns a Hint instance)
-    tutor_chain = tutor_prompt | llm_tutor
+        return {}
     
     try:
         # Prepare inputs, ensuring 'feedback' is handled (will be None on the first pass)
         inputs = {
-            "problem_context": state["problem_context"],
-            "user_code": state["user_code"],
-            "language": state["language"],
+            **shared_context_inputs(state),
             "execution_output": state["execution_output"],
             "generated_test_case": state["generated_test_case"],
             "feedback": state.get("feedback", "No prior feedback.")
         }
         
-        # Invoke the chain, which returns a Hint Pydantic model
-        hint_model: Hint = tutor_chain.invoke(inputs)
+        # Invoke the chain; 'parsed' holds the Hint Pydantic model
+        started = time.perf_counter()
+        # Chain prompt -> structured LLM (returns the raw message and the parsed Hint)
+        result, source = call_with_resilience(
+            "openai", lambda timeout: (tutor_prompt | structured_tutor(timeout)).invoke(inputs), state, "tutor",
+            key=cache_key("tutor", inputs),
+        )
+        if result["parsed"] is None:
+            raise ValueError(f"Could not parse the structured hint: {result['parsing_error']}")
+        hint_model: Hint = result["parsed"]
         
         print(f"Initial Hint Generated (Analysis: {hint_model.analysis})")
         
@@ -77,7 +80,8 @@ def generate_socratic_hint(state: GraphState) -> GraphState:
             "current_hint": hint_model,
             "reflection_count": reflection_count,
             # Reset feedback for the next loop (if any)
-            "feedback": None
+            "feedback": None,
+            "llm_metrics": record_llm_call_if_live("tutor", started, result["raw"], source),
         }
         
     except Exception as e: